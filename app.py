@@ -1,10 +1,61 @@
 import streamlit as st
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import numpy as np
+from io import BytesIO
+import asyncio
+import threading
+import httpx
 from datetime import datetime
 from typing import Dict, Tuple, Optional, List
 
+# Static HTML emitted on every rerun, built once at import
+_HEADER_HTML = """
+<h1 style='text-align: center; color: #1E88E5; padding: 1rem;'>
+    📊 JSE Market Watch
+</h1>
+"""
+
+_EXPANDER_STYLE = """
+<style>
+div[data-testid="stExpander"] div[role="button"] p {
+    font-size: 1.1rem;
+    font-weight: 600;
+}
+</style>
+"""
+
+_SUMMARY_HEADER_HTML = """
+<h3 style='color: #1E88E5; padding: 1rem 0;'>
+    📈 Market Summary
+</h3>
+"""
+
+_DATA_HEADER_HTML = """
+<h3 style='color: #1E88E5; padding: 1rem 0;'>
+    📊 Market Data
+</h3>
+"""
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_tables_cached(url: str, _scraper: "JSEScraper") -> Tuple[Dict[str, pd.DataFrame], datetime]:
+    """Fetch and parse tables from JSE website with their fetch time, cached per URL for five minutes"""
+    content, = _scraper.run(_scraper.fetch_pages([url]))
+    
+    # Parse every table in a single pass over the document
+    all_tables = pd.read_html(BytesIO(content), flavor='lxml')
+    
+    if len(all_tables) < 5:
+        raise ValueError("Could not find all required tables on the page")
+    
+    tables = {
+        "Table 1": all_tables[0],
+        "Table 3": JSEScraper._shrink(JSEScraper._clean_table(all_tables[2])),
+        "Table 5": JSEScraper._shrink(JSEScraper._clean_table(all_tables[4]))
+    }
+    # Build the overall market table once per fetch instead of on every rerun
+    tables["Combined"] = MarketAnalyzer.combine_tables(tables)
+    return tables, datetime.now()
+
 class JSEScraper:
     """Class to handle JSE web scraping operations"""
     
@@ -13,34 +64,71 @@ class JSEScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Persistent client so refreshes reuse pooled connections. Its connections
+        # are tied to the loop they were opened on, so the scraper keeps its own
+        # event loop instead of creating a new one per fetch with asyncio.run.
+        self.client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=30.0
+        )
+        self._loop = asyncio.new_event_loop()
+        self._lock = threading.Lock()
 
-    def fetch_tables(self) -> Optional[Dict[str, pd.DataFrame]]:
-        """Fetch and parse tables from JSE website"""
-        try:
-            response = requests.get(self.url, headers=self.headers)
+    def run(self, coro):
+        """Run a coroutine to completion on the scraper's event loop"""
+        with self._lock:
+            return self._loop.run_until_complete(coro)
+
+    async def fetch_pages(self, urls: List[str]) -> List[bytes]:
+        """Fetch several pages concurrently and return their raw bodies"""
+        responses = await asyncio.gather(*(self.client.get(url) for url in urls))
+        for response in responses:
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            tables = soup.find_all('table')
-            
-            if len(tables) < 5:
-                st.error("Could not find all required tables on the page")
-                return None
-            
-            return {
-                "Table 1": pd.read_html(str(tables[0]))[0],
-                "Table 3": self._clean_table(pd.read_html(str(tables[2]))[0]),
-                "Table 5": self._clean_table(pd.read_html(str(tables[4]))[0])
-            }
-            
+        return [response.content for response in responses]
+
+    def fetch_tables(self) -> Optional[Tuple[Dict[str, pd.DataFrame], datetime]]:
+        """Fetch and parse tables from JSE website, with the time they were fetched"""
+        try:
+            return _fetch_tables_cached(self.url, self)
         except Exception as e:
             st.error(f"An error occurred while fetching data: {str(e)}")
             return None
 
     @staticmethod
     def _clean_table(df: pd.DataFrame) -> pd.DataFrame:
-        """Remove unnamed columns from DataFrame"""
-        return df.loc[:, ~df.columns.str.contains('^Unnamed', na=False)]
+        """Remove unnamed columns, parse the weekly percent change and use Arrow strings"""
+        df = df.loc[:, ~df.columns.str.contains('^Unnamed', na=False)]
+        if 'Week Change (%)' in df.columns:
+            df = df.assign(**{'Week Change (%)': pd.to_numeric(
+                df['Week Change (%)'].astype('string').str.rstrip('%'), errors='coerce'
+            ).astype('float32')})
+        # Store text columns in Arrow buffers rather than as Python objects
+        text_cols = [name for name, col in df.items() if col.dtype == object or isinstance(col.dtype, pd.StringDtype)]
+        return df.astype({name: 'string[pyarrow]' for name in text_cols})
+
+    @staticmethod
+    def _shrink(df: pd.DataFrame, max_cat_ratio: float = 0.5) -> pd.DataFrame:
+        """Downcast numeric columns and store low-cardinality text columns as categories"""
+        converted = {}
+        for name, col in df.items():
+            if pd.api.types.is_float_dtype(col):
+                # Downcast only when float32 holds every value exactly, so prices are not shown with error
+                as_float32 = col.astype('float32')
+                if np.array_equal(as_float32.astype('float64'), col, equal_nan=True):
+                    converted[name] = as_float32
+            elif pd.api.types.is_integer_dtype(col):
+                converted[name] = pd.to_numeric(col, downcast='integer')
+            elif isinstance(col.dtype, pd.StringDtype) and len(col) and col.nunique() / len(col) < max_cat_ratio:
+                converted[name] = col.astype('category')
+        return df.assign(**converted)
+
+def _take_with_ties(positions: np.ndarray, beyond: np.ndarray, at_cutoff: np.ndarray, k: int) -> np.ndarray:
+    """Positions past the cutoff, topped up with the earliest rows equal to it"""
+    chosen = positions[beyond]
+    return np.sort(np.concatenate([chosen, positions[at_cutoff][:k - len(chosen)]]))
 
 class MarketAnalyzer:
     """Class to handle market data analysis"""
@@ -48,18 +136,26 @@ class MarketAnalyzer:
     @staticmethod
     def get_top_movers(df: pd.DataFrame, symbol_col: str, pct_change_col: str, n: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Calculate top gainers and decliners"""
-        df_copy = df.copy()
+        # Percent change is already numeric, parsed once in JSEScraper._clean_table
+        vals = df[pct_change_col].to_numpy(dtype='float64', na_value=np.nan)
+        missing = np.isnan(vals)
+        valid = np.flatnonzero(~missing)
+        cols = [df.columns.get_loc(col) for col in (symbol_col, pct_change_col)]
+        k = min(n, len(valid))
+        top = bot = valid[:0]
         
-        # Convert percentage change to numeric
-        if df_copy[pct_change_col].dtype == object:
-            df_copy[pct_change_col] = df_copy[pct_change_col].apply(
-                lambda x: pd.to_numeric(str(x).replace('%', ''), errors='coerce')
-            )
-        else:
-            df_copy[pct_change_col] = pd.to_numeric(df_copy[pct_change_col], errors='coerce')
+        if k:
+            # A single partition finds both the k-th smallest and k-th largest values
+            valid_vals = vals[valid]
+            bounds = np.partition(valid_vals, sorted({k - 1, len(valid) - k}))
+            top_cut, bot_cut = bounds[len(valid) - k], bounds[k - 1]
+            top = _take_with_ties(valid, valid_vals > top_cut, valid_vals == top_cut, k)
+            bot = _take_with_ties(valid, valid_vals < bot_cut, valid_vals == bot_cut, k)
         
-        gainers = df_copy.nlargest(n, pct_change_col)[[symbol_col, pct_change_col]]
-        decliners = df_copy.nsmallest(n, pct_change_col)[[symbol_col, pct_change_col]]
+        # Like nlargest/nsmallest, pad with the earliest NaN rows when n exceeds the valid rows
+        padding = np.flatnonzero(missing)[:n - k]
+        gainers = df.iloc[np.concatenate([top, padding]), cols].sort_values(pct_change_col, ascending=False, kind='stable')
+        decliners = df.iloc[np.concatenate([bot, padding]), cols].sort_values(pct_change_col, kind='stable')
         
         return gainers, decliners
 
@@ -68,12 +164,17 @@ class MarketAnalyzer:
         """Combine multiple tables into one DataFrame"""
         return pd.concat([tables[key] for key in table_keys], ignore_index=True)
 
+@st.cache_resource(show_spinner=False)
+def _get_scraper(url: str) -> JSEScraper:
+    """Return a process-wide scraper so its connection pool survives reruns"""
+    return JSEScraper(url)
+
 class StreamlitUI:
     """Class to handle Streamlit UI components and layout"""
     
     def __init__(self):
         self.initialize_session_state()
-        self.scraper = JSEScraper("https://www.jamstockex.com/trading/trade-quotes/weekly-quotes/")
+        self.scraper = _get_scraper("https://www.jamstockex.com/trading/trade-quotes/weekly-quotes/")
         self.analyzer = MarketAnalyzer()
         # Set page config
         st.set_page_config(
@@ -89,55 +190,41 @@ class StreamlitUI:
             st.session_state['last_refresh'] = None
         if 'tables' not in st.session_state:
             st.session_state['tables'] = None
+        if 'csvs' not in st.session_state:
+            st.session_state['csvs'] = None
         if 'top_n' not in st.session_state:
             st.session_state['top_n'] = 5
 
     def display_header(self):
         """Display page header and controls"""
         # Title section with custom styling
-        st.markdown("""
-        <h1 style='text-align: center; color: #1E88E5; padding: 1rem;'>
-            📊 JSE Market Watch
-        </h1>
-        """, unsafe_allow_html=True)
+        st.markdown(_HEADER_HTML, unsafe_allow_html=True)
         
         # Control panel in a container
         with st.container():
-            st.markdown("""
-            <style>
-            div[data-testid="stExpander"] div[role="button"] p {
-                font-size: 1.1rem;
-                font-weight: 600;
-            }
-            </style>
-            """, unsafe_allow_html=True)
+            st.markdown(_EXPANDER_STYLE, unsafe_allow_html=True)
             
             with st.expander("📋 CONTROL PANEL", expanded=True):
-                col1, col2, col3 = st.columns([2, 1, 1])
+                col1, col2 = st.columns([3, 1])
                 with col1:
                     refresh_clicked = st.button(
                         "🔄 Refresh Data",
                         use_container_width=True,
                     )
-                    if refresh_clicked:
-                        st.session_state['last_refresh'] = datetime.now()
                 with col2:
-                    st.number_input(
-                        "📊 Top Movers Count",
-                        min_value=1,
-                        max_value=20,
-                        value=st.session_state['top_n'],
-                        key='number_input_key',
-                        on_change=self.on_top_n_change
-                    )
-                with col3:
-                    if st.session_state['last_refresh']:
-                        st.markdown(f"**Last Update:**  \n{st.session_state['last_refresh'].strftime('%Y-%m-%d %H:%M:%S')}")
-                    else:
-                        st.markdown("**Last Update:**  \nNo data loaded")
+                    # Filled again after a refresh, once the fetch time is known
+                    self.last_update_slot = st.empty()
+                    self.display_last_update()
 
         return refresh_clicked
 
+    def display_last_update(self):
+        """Display when the shown data was fetched from the JSE website"""
+        if st.session_state['last_refresh']:
+            self.last_update_slot.markdown(f"**Last Update:**  \n{st.session_state['last_refresh'].strftime('%Y-%m-%d %H:%M:%S')}")
+        else:
+            self.last_update_slot.markdown("**Last Update:**  \nNo data loaded")
+
     def display_movers(self, gainers: pd.DataFrame, decliners: pd.DataFrame, table_name: str):
         """Display top movers in a formatted layout"""
         st.markdown(f"#### {table_name}")
@@ -153,29 +240,33 @@ class StreamlitUI:
         st.markdown(f"**{icon} Top {len(df)} {title}**")
         
         # Create a styled table
-        table_data = []
-        for _, row in df.iterrows():
-            symbol, change = row.iloc[0], row.iloc[1]
-            sign = '+' if title == "Gainers" else ''
-            table_data.append([symbol, f"{sign}{change:.2f}%"])
-        
-        df_display = pd.DataFrame(table_data, columns=["Symbol", "Change"])
+        sign = '+' if title == "Gainers" else ''
+        df_display = pd.DataFrame({
+            "Symbol": df.iloc[:, 0].to_numpy(),
+            "Change": df.iloc[:, 1].map(f"{sign}{{:.2f}}%".format).to_numpy()
+        })
         st.dataframe(df_display, hide_index=True, use_container_width=True)
 
+    @st.fragment
     def display_market_summary(self, tables: Dict[str, pd.DataFrame]):
-        """Display market summary section"""
+        """Display market summary section, rerun on its own when top_n changes"""
         with st.container():
-            st.markdown("""
-                <h3 style='color: #1E88E5; padding: 1rem 0;'>
-                    📈 Market Summary
-                </h3>
-            """, unsafe_allow_html=True)
+            st.markdown(_SUMMARY_HEADER_HTML, unsafe_allow_html=True)
+            
+            # Kept inside the fragment so changing it skips the full page rerun
+            st.number_input(
+                "📊 Top Movers Count",
+                min_value=1,
+                max_value=20,
+                value=st.session_state['top_n'],
+                key='number_input_key',
+                on_change=self.on_top_n_change
+            )
             
             try:
                 # Overall market analysis
-                combined_df = self.analyzer.combine_tables(tables)
                 gainers_overall, decliners_overall = self.analyzer.get_top_movers(
-                    combined_df, "Symbol", "Week Change (%)", st.session_state['top_n']
+                    tables["Combined"], "Symbol", "Week Change (%)", st.session_state['top_n']
                 )
                 
                 tabs = st.tabs(["Overall Market", "Ordinary Shares", "Preference Shares"])
@@ -200,11 +291,7 @@ class StreamlitUI:
 
     def display_market_data(self, tables: Dict[str, pd.DataFrame]):
         """Display market data section"""
-        st.markdown("""
-            <h3 style='color: #1E88E5; padding: 1rem 0;'>
-                📊 Market Data
-            </h3>
-        """, unsafe_allow_html=True)
+        st.markdown(_DATA_HEADER_HTML, unsafe_allow_html=True)
         
         table_names = {
             "Table 1": "INDICES",
@@ -222,7 +309,7 @@ class StreamlitUI:
                 with col2:
                     st.download_button(
                         label=f"📥 Download {table_name}",
-                        data=tables[table_key].to_csv(index=False),
+                        data=st.session_state['csvs'][table_key],
                         file_name=f"jse_{table_name.lower().replace(' ', '_')}.csv",
                         mime="text/csv",
                         use_container_width=True
@@ -239,8 +326,14 @@ class StreamlitUI:
         
         if refresh_clicked:
             with st.spinner("📊 Fetching latest market data..."):
-                tables = self.scraper.fetch_tables()
+                tables, fetched_at = self.scraper.fetch_tables() or (None, None)
                 st.session_state['tables'] = tables
+                st.session_state['last_refresh'] = fetched_at
+                self.display_last_update()
+                # Serialize downloads once per fetch rather than on every rerun
+                st.session_state['csvs'] = {
+                    key: df.to_csv(index=False).encode('utf-8') for key, df in tables.items() if key != "Combined"
+                } if tables else None
                 
                 if tables:
                     self.display_market_summary(tables)
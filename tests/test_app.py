@@ -0,0 +1,139 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import JSEScraper, MarketAnalyzer
+
+_QUOTES_PAGE = "".join(
+    f"<table><tr><th>Symbol</th><th>Week Change (%)</th></tr><tr><td>S{i}</td><td>{i}.00%</td></tr></table>"
+    for i in range(5)
+).encode()
+
+
+class _RedirectingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/old-quotes/":
+            self.send_response(301)
+            self.send_header("Location", "/weekly-quotes/")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(_QUOTES_PAGE)))
+        self.end_headers()
+        self.wfile.write(_QUOTES_PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def _expected(df: pd.DataFrame, n: int):
+    """Reference result from Series.nlargest/nsmallest, which skip NaN rows"""
+    cols = ["Symbol", "Week Change (%)"]
+    pct = df["Week Change (%)"]
+    return df.loc[pct.nlargest(n).index, cols], df.loc[pct.nsmallest(n).index, cols]
+
+
+@pytest.mark.parametrize("n", [1, 3, 5, 14, 20])
+def test_top_movers_ties_match_nlargest(n):
+    df = pd.DataFrame({
+        "Symbol": [f"P{i}" for i in range(14)],
+        "Week Change (%)": np.array([0.0] * 12 + [1.2, -0.5], dtype="float32"),
+    })
+    gainers, decliners = MarketAnalyzer.get_top_movers(df, "Symbol", "Week Change (%)", n)
+    expected_gainers, expected_decliners = _expected(df, n)
+    pd.testing.assert_frame_equal(gainers, expected_gainers)
+    pd.testing.assert_frame_equal(decliners, expected_decliners)
+
+
+def test_top_movers_random_ties_match_nlargest():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        size = int(rng.integers(1, 30))
+        values = rng.choice([-1.0, 0.0, 0.5, 2.0, np.nan], size=size).astype("float32")
+        df = pd.DataFrame({"Symbol": [f"S{i}" for i in range(size)], "Week Change (%)": values})
+        n = int(rng.integers(1, 21))
+        gainers, decliners = MarketAnalyzer.get_top_movers(df, "Symbol", "Week Change (%)", n)
+        expected_gainers, expected_decliners = _expected(df, n)
+        pd.testing.assert_frame_equal(gainers, expected_gainers)
+        pd.testing.assert_frame_equal(decliners, expected_decliners)
+
+
+def test_top_movers_missing_symbol_column_raises():
+    df = pd.DataFrame({
+        "Ticker": ["A", "B"],
+        "Week Change (%)": np.array([1.0, -1.0], dtype="float32"),
+        "Volume": [100, 200],
+    })
+    with pytest.raises(KeyError):
+        MarketAnalyzer.get_top_movers(df, "Symbol", "Week Change (%)", 1)
+
+
+def test_fetch_tables_follows_redirects():
+    server = HTTPServer(("127.0.0.1", 0), _RedirectingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        scraper = JSEScraper(f"http://127.0.0.1:{server.server_port}/old-quotes/")
+        result = scraper.fetch_tables()
+    finally:
+        server.shutdown()
+    assert result is not None
+    tables, _ = result
+    assert tables["Table 3"]["Symbol"].tolist() == ["S2"]
+    assert tables["Combined"]["Symbol"].tolist() == ["S2", "S4"]
+
+
+def test_shrink_downcasts_and_keeps_layout():
+    df = pd.DataFrame(
+        {"Symbol": pd.array(["A", "B", "C", "D", "E"], dtype="string"),
+         "Sector": pd.array(["x", "x", "x", "x", "y"], dtype="string"),
+         "Change": [1.5, 2.0, -0.25, np.nan, 5.0],
+         "Price": [1234.56, 2.0, 3.0, 4.0, 5.0],
+         "Volume": [1, 2, 3, 4, 5]},
+        index=[10, 11, 12, 13, 14],
+    )
+    shrunk = JSEScraper._shrink(df)
+    assert list(shrunk.columns) == list(df.columns)
+    assert list(shrunk.index) == list(df.index)
+    assert shrunk["Change"].dtype == "float32"
+    assert shrunk["Price"].dtype == "float64"
+    assert shrunk["Price"].iloc[0] == 1234.56
+    assert shrunk["Volume"].dtype == "int8"
+    assert isinstance(shrunk["Sector"].dtype, pd.CategoricalDtype)
+    assert isinstance(shrunk["Symbol"].dtype, pd.StringDtype)
+
+
+def test_shrink_handles_frame_without_columns():
+    df = pd.DataFrame(index=range(3))
+    pd.testing.assert_frame_equal(JSEScraper._shrink(df), df)
+
+
+def test_clean_table_drops_unnamed_and_parses_week_change():
+    raw = pd.DataFrame({
+        "Symbol": ["ABC", "DEF", "GHI"],
+        "Unnamed: 1": [np.nan, np.nan, np.nan],
+        "Week Change (%)": ["1.23%", "-0.50%", "-"],
+        "Unnamed: 3": ["", "", ""],
+    })
+    cleaned = JSEScraper._clean_table(raw)
+    assert list(cleaned.columns) == ["Symbol", "Week Change (%)"]
+    assert cleaned["Week Change (%)"].dtype == "float32"
+    np.testing.assert_array_equal(
+        cleaned["Week Change (%)"].to_numpy(), np.array([1.23, -0.5, np.nan], dtype="float32")
+    )
+    assert cleaned["Symbol"].dtype == "string[pyarrow]"
+
+
+def test_fetch_tables_reports_original_fetch_time_on_cache_hit():
+    server = HTTPServer(("127.0.0.1", 0), _RedirectingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        scraper = JSEScraper(f"http://127.0.0.1:{server.server_port}/weekly-quotes/")
+        _, first_fetched_at = scraper.fetch_tables()
+        _, second_fetched_at = scraper.fetch_tables()
+    finally:
+        server.shutdown()
+    assert second_fetched_at == first_fetched_at